@@ -0,0 +1,199 @@
+# Shared generation engine for the backend scaffolding scripts (pyback.py, pyback2.py)
+#
+# Templates are registered by relative path and rendered into the output directory.
+# Files whose content is unchanged are left untouched (no mtime bump, so nodemon and
+# Docker layer caches stay valid), changed files are written atomically through a
+# temp file + rename, and the sha256 of every generated file is kept in a manifest.
+# The manifest also records which generator owns each path; a template whose path
+# belongs to another generator is reported as a conflict and never written.
+# Run a generator with --check to report drift without writing anything.
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MANIFEST_FILE = '.scaffold-manifest.json'
+
+# Permissions for newly created files, honouring the process umask
+_umask = os.umask(0)
+os.umask(_umask)
+DEFAULT_FILE_MODE = 0o666 & ~_umask
+
+
+class TemplateRegistry:
+    def __init__(self, name, templates=None):
+        self.name = name
+        self.templates = {}
+        for path, content in (templates or {}).items():
+            self.register(path, content)
+
+    def register(self, path, content):
+        if path in self.templates:
+            raise ValueError(f"Template already registered: {path}")
+        self.templates[path] = content
+
+    def items(self):
+        return self.templates.items()
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(path):
+    try:
+        with open(path, 'rb') as f:
+            return content_hash(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def load_manifest(root):
+    try:
+        with open(os.path.join(root, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def atomic_write(path, data):
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = DEFAULT_FILE_MODE
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.scaffold-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+# Compare one template against the file on disk:
+# 'unchanged', 'created' (missing on disk), 'updated' (content differs)
+# or 'conflict' (the path was generated by a different registry)
+def plan_file(root, manifest, path, content, generator):
+    data = content.encode('utf-8')
+    expected = content_hash(data)
+    actual = file_hash(os.path.join(root, path))
+    owner = manifest.get(path, {}).get('generator')
+
+    if owner is not None and owner != generator:
+        status = 'conflict'
+    elif actual == expected:
+        status = 'unchanged'
+    elif actual is None:
+        status = 'created'
+    else:
+        status = 'updated'
+
+    # The file was edited by hand since it was last generated
+    recorded = manifest.get(path, {}).get('sha256')
+    locally_modified = actual is not None and recorded is not None and actual != recorded
+
+    return {
+        'path': path,
+        'status': status,
+        'sha256': expected,
+        'data': data,
+        'owner': owner,
+        'locallyModified': locally_modified
+    }
+
+
+def render(registry, root='.', check=False, workers=8):
+    start = time.perf_counter()
+    manifest = load_manifest(root)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        plans = list(pool.map(
+            lambda item: plan_file(root, manifest, item[0], item[1], registry.name),
+            registry.items()
+        ))
+
+        if not check:
+            pending = [plan for plan in plans if plan['status'] in ('created', 'updated')]
+            list(pool.map(
+                lambda plan: atomic_write(os.path.join(root, plan['path']), plan['data']),
+                pending
+            ))
+
+    if not check:
+        for plan in plans:
+            if plan['status'] == 'conflict':
+                continue
+            manifest[plan['path']] = {'sha256': plan['sha256'], 'generator': registry.name}
+
+        # Like the generated files, the manifest is only rewritten when its content changes
+        manifest_path = os.path.join(root, MANIFEST_FILE)
+        manifest_data = (json.dumps(manifest, indent=2, sort_keys=True) + '\n').encode('utf-8')
+        if file_hash(manifest_path) != content_hash(manifest_data):
+            atomic_write(manifest_path, manifest_data)
+
+    return {
+        'root': root,
+        'plans': plans,
+        'elapsedMs': (time.perf_counter() - start) * 1000
+    }
+
+
+def print_report(registry, report, check):
+    drift = [plan for plan in report['plans'] if plan['status'] in ('created', 'updated')]
+
+    print(f"{'Checking' if check else 'Generating'} {registry.name} files in {report['root']}:")
+    for plan in report['plans']:
+        label = plan['status']
+        if check and label in ('created', 'updated'):
+            label = 'missing' if label == 'created' else 'drifted'
+        if plan['status'] == 'conflict':
+            note = f" (generated by {plan['owner']})"
+        elif plan['locallyModified']:
+            note = ' (edited since last generation)'
+        else:
+            note = ''
+        print(f"  {label:<10} {plan['path']}{note}")
+
+    verb = 'out of date' if check else 'written'
+    print(f"\n{len(drift)} of {len(report['plans'])} files {verb} "
+          f"({report['elapsedMs']:.1f} ms)")
+
+    conflicts = [plan for plan in report['plans'] if plan['status'] == 'conflict']
+    if conflicts:
+        print(f"{len(conflicts)} files belong to another generator and were left untouched")
+
+
+# Parse the shared command-line options and render the registry.
+# In --check mode the process exits with status 1 when any file has drifted;
+# in either mode it exits with status 1 when a template collides with another generator.
+def run(registry, argv=None):
+    parser = argparse.ArgumentParser(description=f"Generate backend files ({registry.name})")
+    parser.add_argument('--check', action='store_true',
+                        help='report files that differ from the templates without writing them')
+    parser.add_argument('--root', default='.',
+                        help='directory to generate into (default: current directory)')
+    args, _ = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+
+    report = render(registry, root=args.root, check=args.check)
+    print_report(registry, report, args.check)
+
+    if args.check:
+        drifted = any(plan['status'] != 'unchanged' for plan in report['plans'])
+        sys.exit(1 if drifted else 0)
+
+    if any(plan['status'] == 'conflict' for plan in report['plans']):
+        sys.exit(1)
+
+    return report